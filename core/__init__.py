@@ -1 +1,2 @@
-__all__ = ['entity_recognizer', 'utilities', 'keywords']
+__all__ = ['entity_recognizer', 'utilities', 'keywords', 'batching',
+           'profiling', 'skill_matcher', 'ranking', 'dedup', 'export']
@@ -0,0 +1,160 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import collections
+import queue
+import threading
+import time
+
+from concurrent.futures import Future
+
+
+class InferenceExecutor(object):
+    '''
+    Gathers concurrent inference requests for a shared spaCy pipeline and
+    runs them together through `nlp.pipe`, routing each resulting `Doc`
+    back to the caller that submitted the text.
+
+    A batch is flushed as soon as it holds `max_batch` texts or the oldest
+    waiting text has been queued for `max_latency` seconds, whichever comes
+    first. The executor can be called like the pipeline itself, so it can be
+    handed to code that expects `nlp(text)`.
+    '''
+
+    def __init__(self, nlp, max_latency=0.005, max_batch=32):
+        '''
+        :param nlp: object of `spacy.language.Language`
+        :param max_latency: seconds a request may wait for a batch to fill
+        :param max_batch: maximum number of texts run in a single batch
+        '''
+
+        self.__nlp = nlp
+        self.max_latency = max_latency
+        self.max_batch = max_batch
+
+        self.__queue = queue.Queue()
+        self.__worker = None
+        self.__lock = threading.Lock()
+
+        self.__batch_sizes = collections.Counter()
+        self.__requests = 0
+        self.__errors = 0
+
+    @property
+    def vocab(self):
+        return self.__nlp.vocab
+
+    def __call__(self, text):
+        return self.submit(text).result()
+
+    def submit(self, text):
+        '''
+        Queue a text for the next batch
+
+        :param text: plain text to be processed
+        :return: object of `concurrent.futures.Future` resolving to a
+                 `spacy.tokens.doc.Doc`
+        '''
+
+        self.__ensure_worker()
+        future = Future()
+        self.__queue.put((text, future))
+        return future
+
+    def get_metrics(self):
+        '''
+        Helper function to report batching statistics
+
+        :return: dictionary with request counts and batch size distribution
+        '''
+
+        with self.__lock:
+            sizes = dict(self.__batch_sizes)
+            requests = self.__requests
+            errors = self.__errors
+
+        batches = sum(sizes.values())
+        return {
+            'requests': requests,
+            'batches': batches,
+            'errors': errors,
+            'mean_batch_size': round(requests / batches, 2) if batches else 0,
+            'batch_sizes': {str(k): sizes[k] for k in sorted(sizes)},
+            'max_latency': self.max_latency,
+            'max_batch': self.max_batch,
+            }
+
+    def __ensure_worker(self):
+
+        # the worker thread is started on first use rather than at
+        # construction so that forking servers (gunicorn) do not inherit
+        # a thread that no longer exists in the child process
+
+        if self.__worker is not None and self.__worker.is_alive():
+            return
+
+        with self.__lock:
+            if self.__worker is None or not self.__worker.is_alive():
+                self.__worker = threading.Thread(target=self.__run,
+                        name='inference-executor')
+                self.__worker.daemon = True
+                self.__worker.start()
+
+    def __collect(self):
+
+        # block for the first request, then keep gathering until the batch
+        # is full or the first request has waited `max_latency` seconds
+
+        batch = [self.__queue.get()]
+        deadline = time.monotonic() + self.max_latency
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.__queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def __run(self):
+        while True:
+            batch = self.__collect()
+            batch = [(text, future) for (text, future) in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            texts = [text for (text, _) in batch]
+            try:
+                docs = list(self.__nlp.pipe(texts, batch_size=len(texts)))
+            except Exception:
+
+                # one bad text (e.g. over `nlp.max_length`) must not fail
+                # the other requests of the batch, so retry them one by one
+
+                self.__run_each(batch)
+                continue
+
+            with self.__lock:
+                self.__batch_sizes[len(batch)] += 1
+                self.__requests += len(batch)
+
+            for ((_, future), doc) in zip(batch, docs):
+                future.set_result(doc)
+
+    def __run_each(self, batch):
+        for (text, future) in batch:
+            try:
+                doc = self.__nlp(text)
+            except Exception as e:
+                with self.__lock:
+                    self.__errors += 1
+                future.set_exception(e)
+                continue
+
+            with self.__lock:
+                self.__batch_sizes[1] += 1
+                self.__requests += 1
+            future.set_result(doc)
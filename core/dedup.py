@@ -0,0 +1,267 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import os
+import pickle
+import re
+import threading
+import zlib
+
+import numpy as np
+
+# Mersenne prime used by the universal hash family of the permutations
+PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+WORD = re.compile(r'\w+')
+
+# texts with fewer shingles (e.g. scanned PDFs without a text layer) are
+# not deduplicated, their signatures would all collide
+MIN_SHINGLES = 20
+
+_PERMUTATIONS = {}
+
+
+def shingles(text, size=3):
+    '''
+    Helper function to split text into hashed word shingles
+
+    :param text: plain text extracted from resume file
+    :param size: number of words per shingle
+    :return: array of unique 32 bit shingle hashes
+    '''
+
+    words = WORD.findall(text.lower())
+    hashes = {zlib.crc32(' '.join(words[i:i + size]).encode('utf-8'))
+              for i in range(len(words) - size + 1)}
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def minhash_signature(text, num_perm=128, seed=1, min_shingles=MIN_SHINGLES):
+    '''
+    Helper function to compute the MinHash signature of a text
+
+    :param text: plain text extracted from resume file
+    :param num_perm: number of hash permutations
+    :param seed: seed of the permutations, must match between signatures
+    :param min_shingles: minimum number of distinct shingles of the text
+    :return: array of `num_perm` minimum hashes, or None when the text has
+             fewer than `min_shingles` shingles
+    '''
+
+    hashes = shingles(text)
+    if len(hashes) < max(min_shingles, 1):
+        return None
+
+    key = (num_perm, seed)
+    if key not in _PERMUTATIONS:
+        generator = np.random.RandomState(seed)
+        _PERMUTATIONS[key] = (
+            generator.randint(1, int(MAX_HASH), size=num_perm,
+                              dtype=np.uint64),
+            generator.randint(0, int(MAX_HASH), size=num_perm,
+                              dtype=np.uint64))
+    a, b = _PERMUTATIONS[key]
+
+    # a * x + b stays below 2 ** 64 for 32 bit a, b and x
+    permuted = (np.outer(a, hashes) + b[:, None]) % PRIME
+    return (permuted.min(axis=1) & MAX_HASH).astype(np.uint32)
+
+
+def signature_from_bytes(data):
+    '''
+    Helper function to read a signature stored as `signature.tobytes()`,
+    e.g. on the Mongo document
+
+    :param data: bytes of the signature
+    :return: array of minimum hashes
+    '''
+
+    return np.frombuffer(bytes(data), dtype=np.uint32)
+
+
+class LSHIndex(object):
+    '''
+    Locality sensitive hashing index of MinHash signatures.
+
+    Signatures are split into `bands` bands of `rows` values; documents
+    sharing any band are candidates, which are then verified against the
+    estimated Jaccard similarity `threshold`. With the defaults texts
+    sharing about 70% of their shingles are likely to collide.
+
+    The index is persisted as an append-only journal at `path`: every
+    change is appended as a pickled record, and records appended by other
+    processes are replayed before each lookup.
+    '''
+
+    def __init__(self, path=None, bands=16, rows=8, threshold=0.8):
+        '''
+        :param path: journal file, or None for an in-memory index
+        :param bands: number of bands of the signatures
+        :param rows: number of signature values per band
+        :param threshold: minimum estimated Jaccard similarity of duplicates
+        '''
+
+        self.path = path
+        self.bands = bands
+        self.rows = rows
+        self.threshold = threshold
+
+        self.__lock = threading.Lock()
+        self.__signatures = {}
+        self.__buckets = [{} for _ in range(bands)]
+        self.__offset = 0
+        self.__inode = None
+
+        self.__replay()
+
+    def __len__(self):
+        return len(self.__signatures)
+
+    def get(self, doc_id):
+        '''
+        Get the signature of a document
+
+        :param doc_id: identifier of the stored document
+        :return: array returned by `minhash_signature`, or None
+        '''
+
+        with self.__lock:
+            self.__replay()
+            return self.__signatures.get(doc_id)
+
+    def query(self, signature):
+        '''
+        Find the closest near-duplicate of a signature
+
+        :param signature: array returned by `minhash_signature`
+        :return: (doc_id, similarity) of the best match or None
+        '''
+
+        with self.__lock:
+            self.__replay()
+
+            candidates = set()
+            for band, key in enumerate(self.__keys(signature)):
+                candidates.update(self.__buckets[band].get(key, ()))
+
+            best = None
+            for doc_id in candidates:
+                similarity = float(np.mean(self.__signatures[doc_id]
+                                           == signature))
+                if similarity >= self.threshold and \
+                        (best is None or similarity > best[1]):
+                    best = (doc_id, similarity)
+            return best
+
+    def insert(self, doc_id, signature):
+        '''
+        Add or replace the signature of a document
+
+        :param doc_id: identifier of the stored document
+        :param signature: array returned by `minhash_signature`
+        '''
+
+        with self.__lock:
+            self.__record(('insert', doc_id, signature))
+
+    def remove(self, doc_id):
+        '''
+        Remove the signature of a document
+
+        :param doc_id: identifier of the stored document
+        '''
+
+        with self.__lock:
+            self.__record(('remove', doc_id, None))
+
+    def compact(self):
+        '''
+        Rewrite the journal with only the live signatures
+        '''
+
+        if self.path is None:
+            return
+
+        with self.__lock:
+            self.__replay()
+
+            tmp = self.path + '.tmp'
+            with open(tmp, 'wb') as fh:
+                for doc_id, signature in self.__signatures.items():
+                    pickle.dump(('insert', doc_id, signature), fh)
+                self.__offset = fh.tell()
+            os.replace(tmp, self.path)
+            self.__inode = os.stat(self.path).st_ino
+
+    def clear(self):
+        '''
+        Remove every signature, e.g. before re-indexing the collection
+        '''
+
+        with self.__lock:
+            self.__signatures = {}
+            self.__buckets = [{} for _ in range(self.bands)]
+            if self.path is not None and os.path.exists(self.path):
+                os.remove(self.path)
+            self.__offset = 0
+
+    def __keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                for band in range(self.bands)]
+
+    def __apply(self, record):
+        (action, doc_id, signature) = record
+
+        previous = self.__signatures.pop(doc_id, None)
+        if previous is not None:
+            for band, key in enumerate(self.__keys(previous)):
+                bucket = self.__buckets[band][key]
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self.__buckets[band][key]
+
+        if action == 'insert':
+            self.__signatures[doc_id] = signature
+            for band, key in enumerate(self.__keys(signature)):
+                self.__buckets[band].setdefault(key, set()).add(doc_id)
+
+    def __record(self, record):
+        if self.path is None:
+            self.__apply(record)
+            return
+
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        # a single write per record, so that concurrent appends from other
+        # workers do not interleave
+        with open(self.path, 'ab') as fh:
+            fh.write(pickle.dumps(record))
+
+        # applied by replaying the journal, in order with the records
+        # appended by other workers
+        self.__replay()
+
+    def __replay(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb') as fh:
+            inode = os.fstat(fh.fileno()).st_ino
+            if inode != self.__inode:
+                # new journal, or compacted by another process
+                self.__signatures = {}
+                self.__buckets = [{} for _ in range(self.bands)]
+                self.__offset = 0
+                self.__inode = inode
+
+            fh.seek(self.__offset)
+            while True:
+                try:
+                    record = pickle.load(fh)
+                except (EOFError, ValueError, pickle.UnpicklingError):
+                    # end of the journal, or a record still being written
+                    break
+                self.__apply(record)
+                self.__offset = fh.tell()
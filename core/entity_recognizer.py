@@ -4,23 +4,40 @@ import io
 import os
 import pprint
 
-import spacy
-from spacy.matcher import Matcher
+from . import profiling, utilities
 
-from . import utilities
+# custom trained model
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model')
 
 class Parser(object):
 
-    def __init__(self, input_file):
-        nlp = spacy.load('en_core_web_sm')
+    def __init__(self, input_file, nlp=None, entity_recognizer=None,
+                 text=None, skill_max_distance=1, skill_max_candidates=1):
+
+        # `nlp` and `entity_recognizer` may be any callable mapping text to a
+        # `Doc` (e.g. a shared `batching.InferenceExecutor`); the models are
+        # loaded here only when the caller does not provide them
+
+        # spaCy is imported on first use to keep `import core` fast
+        import spacy
+        from spacy.matcher import Matcher
+
+        if nlp is None:
+            nlp = spacy.load('en_core_web_sm')
 
         # load custom trained model
-        root = os.path.dirname(os.path.abspath(__file__))
-        model = os.path.join(root, 'model')
-        trained_entity_recognizer = spacy.load(model)
+        if entity_recognizer is None:
+            entity_recognizer = spacy.load(MODEL_PATH)
+        trained_entity_recognizer = entity_recognizer
 
         self.__matcher = Matcher(nlp.vocab)
 
+        # typo tolerance of the skills lookup, `skill_max_distance=0`
+        # only matches skills exactly
+        self.__skill_matcher = utilities.get_skill_matcher(
+            max_distance=skill_max_distance,
+            max_candidates=skill_max_candidates)
+
         self.__details = {
             'name': None,
             'email': None,
@@ -32,13 +49,20 @@ class Parser(object):
             'total_experience': None,
             }
 
+        # plain `text` (e.g. a pasted job description) goes through the
+        # same extractors as the text of an uploaded file
+
         self.__raw_file = input_file
-        if not isinstance(self.__raw_file, io.BytesIO):
-            ext = os.path.splitext(self.__raw_file)[1].split('.')[1]
+        if text is not None:
+            self.__text_raw = text
         else:
-            ext = self.__raw_file.name.split('.')[1]
+            if not isinstance(self.__raw_file, io.BytesIO):
+                ext = os.path.splitext(self.__raw_file)[1].split('.')[1]
+            else:
+                ext = self.__raw_file.name.split('.')[1]
 
-        self.__text_raw = utilities.extract_text(self.__raw_file, '.'+ ext)
+            self.__text_raw = utilities.extract_text(self.__raw_file,
+                    '.' + ext)
         self.__text = ' '.join(self.__text_raw.split())
 
         self.__spacy_nlp_token = nlp(self.__text)
@@ -53,6 +77,9 @@ class Parser(object):
     def get_extracted_data(self):
         return self.__details
 
+    def get_extracted_text(self):
+        return self.__text
+
     def __get_basic_details(self):
 
         # extraction based on simple regex matching
@@ -86,7 +113,7 @@ class Parser(object):
         # extract skills
 
         skills = utilities.extract_skills(self.__spacy_nlp_token,
-                self.__noun_chunks)
+                self.__noun_chunks, skill_matcher=self.__skill_matcher)
         self.__details['skills'] = skills
 
         # extraction using trained entity recognizer
@@ -140,6 +167,56 @@ class Parser(object):
         return
 
 
-def extraction_wrapper(input_file):
-    parser = Parser(input_file)
+def extraction_wrapper(input_file, nlp=None, entity_recognizer=None,
+                       skill_max_distance=1, skill_max_candidates=1):
+    parser = Parser(input_file, nlp=nlp,
+                    entity_recognizer=entity_recognizer,
+                    skill_max_distance=skill_max_distance,
+                    skill_max_candidates=skill_max_candidates)
     return parser.get_extracted_data()
+
+
+def text_extraction_wrapper(text, nlp=None, entity_recognizer=None,
+                            skill_max_distance=1, skill_max_candidates=1):
+    parser = Parser(None, nlp=nlp, entity_recognizer=entity_recognizer,
+                    text=text, skill_max_distance=skill_max_distance,
+                    skill_max_candidates=skill_max_candidates)
+    return parser.get_extracted_data()
+
+
+# plac reads the command line arguments from the annotations, so that it
+# only needs to be imported when the module is run as a script
+
+def main(input_file: ('Resume to be parsed', 'positional', None, str),
+         profile: ('Profile the extraction and save a flamegraph',
+                   'flag', 'p') = False,
+         output_dir: ('Folder the profile is written to',
+                      'option', 'o', str) = 'profiles'):
+    """Extract the details of a single resume, optionally profiled."""
+
+    if not profile:
+        pprint.pprint(extraction_wrapper(input_file))
+        return
+
+    import spacy
+
+    with open(input_file, 'rb') as fh:
+        digest = profiling.input_digest(fh.read())
+
+    # the models are loaded outside the profile, which covers the extraction
+    nlp = spacy.load('en_core_web_sm')
+    trained_entity_recognizer = spacy.load(MODEL_PATH)
+
+    with profiling.profiled('extract', digest, output_dir) as profiler:
+        details = extraction_wrapper(input_file,
+            nlp=profiling.PipelineTimer(nlp, profiler),
+            entity_recognizer=profiling.PipelineTimer(
+                trained_entity_recognizer, profiler))
+
+    pprint.pprint(details)
+    print('Saved profile to', profiler.path)
+
+
+if __name__ == '__main__':
+    import plac
+    plac.call(main)
@@ -0,0 +1,237 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from bson.objectid import ObjectId
+
+WATERMARK = '_watermark.json'
+PARTITION = 'ingest_date='
+
+# folders of a full export being written and of the export it replaces,
+# hidden from dataset readers by the leading underscore
+STAGING = '_staging'
+PREVIOUS = '_previous'
+
+SCHEMA = pa.schema([
+    ('_id', pa.string()),
+    ('filename', pa.string()),
+    ('name', pa.string()),
+    ('email', pa.string()),
+    ('skills', pa.list_(pa.string())),
+    ('education', pa.list_(pa.string())),
+    ('qualification', pa.list_(pa.string())),
+    ('profile', pa.list_(pa.string())),
+    ('previous_associations', pa.list_(pa.string())),
+    ('total_experience', pa.float64()),
+    ('duplicates', pa.list_(pa.string())),
+    ])
+
+LIST_FIELDS = ['skills', 'education', 'qualification', 'profile',
+               'previous_associations']
+
+
+def _to_row(record):
+    '''
+    Helper function to flatten a stored record into a row of `SCHEMA`
+
+    :param record: document of the resume collection
+    :return: dictionary of column values
+    '''
+
+    parsed_doc = record.get('parsed_doc') or {}
+
+    row = {
+        '_id': str(record['_id']),
+        'filename': record.get('filename'),
+        'name': parsed_doc.get('name'),
+        'email': parsed_doc.get('email'),
+        'total_experience': parsed_doc.get('total_experience'),
+        'duplicates': record.get('duplicates'),
+        }
+    for field in LIST_FIELDS:
+        values = parsed_doc.get(field)
+        if isinstance(values, str):
+            values = [values]
+        row[field] = values
+    return row
+
+
+def _to_record_batch(rows):
+    '''
+    Helper function to build an Arrow record batch of `SCHEMA` from rows
+    '''
+
+    return pa.RecordBatch.from_arrays(
+        [pa.array([row[field.name] for row in rows], type=field.type)
+         for field in SCHEMA], schema=SCHEMA)
+
+
+def read_watermark(output_dir):
+    '''
+    Helper function to read the id of the last exported document
+
+    :param output_dir: root folder of the export
+    :return: object of `bson.objectid.ObjectId` or None
+    '''
+
+    path = os.path.join(output_dir, WATERMARK)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'r', encoding='utf-8') as fh:
+        return ObjectId(json.load(fh)['last_id'])
+
+
+def write_watermark(output_dir, last_id):
+    '''
+    Helper function to record the id of the last exported document
+
+    :param output_dir: root folder of the export
+    :param last_id: object of `bson.objectid.ObjectId`
+    '''
+
+    path = os.path.join(output_dir, WATERMARK)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump({'last_id': str(last_id)}, fh)
+    os.replace(tmp, path)
+
+
+def move_export(source, target):
+    '''
+    Helper function to move the partitions and watermark of an export to
+    another folder, leaving any other file in `source` alone
+
+    :param source: root folder of the export
+    :param target: folder the export is moved to
+    '''
+
+    if not os.path.exists(source):
+        return
+
+    if not os.path.exists(target):
+        os.makedirs(target)
+
+    for name in os.listdir(source):
+        path = os.path.join(source, name)
+        if (name.startswith(PARTITION) and os.path.isdir(path)) \
+                or name == WATERMARK:
+            os.replace(path, os.path.join(target, name))
+
+
+def export_collection(collection, output_dir, batch_size=1000,
+                      incremental=True):
+    '''
+    Stream the resume collection into Parquet files partitioned by ingest
+    date (`<output_dir>/ingest_date=YYYY-MM-DD/part-<first id>.parquet`)
+
+    Documents are read in `_id` order, `batch_size` at a time, and each
+    batch is written as a row group right away. Ingest dates follow the
+    `_id` order, so only the file of the current date is open, and memory
+    stays bounded by the batch size. With `incremental` only the documents
+    inserted after the watermark of the previous export are read; records
+    updated in place (e.g. linked near-duplicates) are not exported again.
+    Without it, every document is written to `<output_dir>/_staging` and
+    swapped with the previous export once complete, so a failed run
+    leaves the previous export and its watermark in place.
+
+    :param collection: object of `pymongo.collection.Collection`
+    :param output_dir: root folder of the export
+    :param batch_size: number of documents per record batch
+    :param incremental: export only the documents added since the last run
+    :return: number of documents exported
+    '''
+
+    if not incremental:
+        staging = os.path.join(output_dir, STAGING)
+        previous = os.path.join(output_dir, PREVIOUS)
+
+        # left over by a failed run
+        for folder in (staging, previous):
+            if os.path.exists(folder):
+                shutil.rmtree(folder)
+
+        exported = export_collection(collection, staging,
+                                     batch_size=batch_size)
+
+        move_export(output_dir, previous)
+        move_export(staging, output_dir)
+        for folder in (staging, previous):
+            if os.path.exists(folder):
+                shutil.rmtree(folder)
+        return exported
+
+    query = {}
+    watermark = read_watermark(output_dir)
+    if watermark is not None:
+        query = {'_id': {'$gt': watermark}}
+
+    cursor = collection.find(query, {'filename': 1, 'parsed_doc': 1,
+                             'duplicates': 1}).sort('_id', 1)
+    cursor = cursor.batch_size(batch_size)
+
+    # (date, writer) of the partition being written, and the number of
+    # files written per date in case ids from other clients go back a day
+    current = [None, None]
+    parts = {}
+    run_id = None
+    last_id = None
+    exported = 0
+
+    def flush(records):
+        partitions = []
+        for record in records:
+            date = record['_id'].generation_time.strftime('%Y-%m-%d')
+            if not partitions or partitions[-1][0] != date:
+                partitions.append((date, []))
+            partitions[-1][1].append(_to_row(record))
+
+        for date, rows in partitions:
+            if current[0] != date:
+                if current[1] is not None:
+                    current[1].close()
+                    current[1] = None
+
+                folder = os.path.join(output_dir, PARTITION + date)
+                if not os.path.exists(folder):
+                    os.makedirs(folder)
+
+                part = parts.get(date, 0)
+                parts[date] = part + 1
+                filename = 'part-{}.parquet'.format(run_id) if part == 0 \
+                    else 'part-{}-{}.parquet'.format(run_id, part)
+                current[:] = [date, pq.ParquetWriter(
+                    os.path.join(folder, filename), SCHEMA)]
+
+            current[1].write_table(
+                pa.Table.from_batches([_to_record_batch(rows)]))
+
+    try:
+        records = []
+        for record in cursor:
+            if run_id is None:
+                run_id = str(record['_id'])
+            records.append(record)
+            if len(records) == batch_size:
+                flush(records)
+                exported += len(records)
+                last_id = records[-1]['_id']
+                records = []
+
+        if records:
+            flush(records)
+            exported += len(records)
+            last_id = records[-1]['_id']
+    finally:
+        if current[1] is not None:
+            current[1].close()
+
+    # only move the watermark once every file was written completely
+    if last_id is not None:
+        write_watermark(output_dir, last_id)
+
+    return exported
@@ -0,0 +1,135 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Measure the import time of the application modules
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each module, prints the modules that took the most time and checks the
+cumulative import time against `IMPORT_BUDGETS`. Exits with status 1 when a
+module is over its budget, so it can be used as a regression check:
+
+    python -m core.importtime core server
+"""
+
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+
+import plac
+
+# seconds allowed for a cold import of each module
+IMPORT_BUDGETS = {
+    'core': 0.05,
+    'core.entity_recognizer': 0.1,
+    'core.utilities': 0.05,
+    'server': 1.0,
+    }
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module, python=sys.executable):
+    '''
+    Helper function to import a module in a fresh interpreter under
+    `-X importtime`
+
+    :param module: dotted name of the module to import
+    :param python: interpreter to run
+    :return: list of (module, self seconds, cumulative seconds, depth)
+             in import order
+    '''
+
+    process = subprocess.run(
+        [python, '-X', 'importtime', '-c', 'import ' + module],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+
+    timings = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or '[us]' in line:
+            continue
+        self_us, cumulative_us, name = \
+            line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        timings.append((name.strip(), int(self_us) / 1e6,
+                        int(cumulative_us) / 1e6, depth))
+
+    if process.returncode != 0:
+        raise RuntimeError('Unable to import {}:\n{}'.format(module,
+                           process.stderr.strip().splitlines()[-1]))
+    return timings
+
+
+def subtree(timings, module):
+    '''
+    Helper function to keep the imports made by `import module`, dropping
+    the interpreter startup (`site`, `encodings`, ...)
+
+    `-X importtime` lists a module after the modules it imported, so the
+    subtree of a top level import is the run of nested entries before it.
+
+    :param timings: list returned by `measure`
+    :param module: dotted name of the measured module
+    :return: list of timings of `module`, its parent packages and their
+             dependencies
+    '''
+
+    selected = []
+    nested = []
+    for timing in timings:
+        (name, _, _, depth) = timing
+        nested.append(timing)
+        if depth == 0:
+            if name == module or module.startswith(name + '.'):
+                selected.extend(nested)
+            nested = []
+    return selected
+
+
+def total(timings, module):
+    '''
+    Helper function to get the cumulative import time of a module
+
+    :param timings: list returned by `measure`
+    :param module: dotted name of the measured module
+    :return: seconds spent importing `module` and its dependencies
+    '''
+
+    return sum(cumulative for (_, _, cumulative, depth)
+               in subtree(timings, module) if depth == 0)
+
+
+@plac.annotations(
+    modules=('Modules to measure, defaults to the budgeted ones',
+             'positional', None, str),
+    top=('Number of slowest modules to show', 'option', 'n', int),
+)
+def main(top=15, *modules):
+    """Print the import time breakdown and check it against the budgets."""
+
+    modules = modules or sorted(IMPORT_BUDGETS)
+    over_budget = []
+
+    for module in modules:
+        timings = measure(module)
+        elapsed = total(timings, module)
+        budget = IMPORT_BUDGETS.get(module)
+
+        print('{}: {:.3f}s{}'.format(module, elapsed,
+              '' if budget is None else ' (budget {:.3f}s)'.format(budget)))
+        for (name, self_s, cumulative, _) in sorted(subtree(timings, module),
+                key=lambda t: t[1], reverse=True)[:top]:
+            print('    {:>8.4f}s self {:>8.4f}s cumulative  {}'.format(
+                  self_s, cumulative, name))
+
+        if budget is not None and elapsed > budget:
+            over_budget.append(module)
+
+    if over_budget:
+        print('Over the import time budget:', ', '.join(over_budget))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    plac.call(main)
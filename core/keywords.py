@@ -12,3 +12,9 @@ NAME_PATTERN = [{'POS': 'PROPN'}, {'POS': 'PROPN'}]
 EDUCATION = ['BE', 'B.E.', 'B.E', 'BS', 'B.S', 'ME', 'M.E','M.E.', 'MS', 'M.S', 'BTECH', 'MTECH','SSC', 'HSC', 'CBSE', 'ICSE', 'X', 'XII']
 
 SECTIONS = ['accomplishments','experience','education','interests','projects','professional experience','publications','skills','certifications','objective','career objective','summary','leadership']
+
+# required years of experience in a job description, e.g. '5+ years of experience',
+# '3-5 yrs experience' or 'experience of at least 4 years'
+YEARS = r'(?P<years>\d{1,2}(\.\d)?)\s*\+?\s*((-|to)\s*\d{1,2}\s*)?(years?|yrs?)\b'
+YEARS_OF_EXPERIENCE = YEARS + r'(\W+\w+){0,4}?\W+(experience|exp)\b'
+EXPERIENCE_OF_YEARS = r'\b(experience|exp)\b(\W+\w+){0,4}?\W+' + YEARS
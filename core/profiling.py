@@ -0,0 +1,195 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import collections
+import contextlib
+import hashlib
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+# distinguishes profiles of the same input written in the same microsecond
+_SEQUENCE = itertools.count()
+
+
+class SamplingProfiler(object):
+    '''
+    Periodically samples the Python stack of a single thread and
+    aggregates the samples as collapsed stacks, the input format of
+    flamegraph.pl, speedscope and similar viewers.
+
+    Frames are labelled `module:function`, so time spent in pdfminer,
+    spaCy, `core.utilities` or pymongo shows up under its own package.
+    '''
+
+    def __init__(self, interval=0.001, thread_id=None):
+        '''
+        :param interval: seconds between two samples
+        :param thread_id: ident of the thread to sample, defaults to the
+                          thread creating the profiler
+        '''
+
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples = collections.Counter()
+        self.pipe_times = collections.Counter()
+        self.duration = 0
+        self.path = None
+
+        self.__stop = threading.Event()
+        self.__sampler = None
+        self.__started = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self.__stop.clear()
+        self.__started = time.monotonic()
+        self.__sampler = threading.Thread(target=self.__run,
+                name='sampling-profiler')
+        self.__sampler.daemon = True
+        self.__sampler.start()
+
+    def stop(self):
+        self.__stop.set()
+        self.__sampler.join()
+        self.duration = time.monotonic() - self.__started
+
+    def write_collapsed(self, path):
+        '''
+        Helper function to write the samples as collapsed stacks
+
+        :param path: destination file
+        '''
+
+        with open(path, 'w', encoding='utf-8') as fh:
+            for stack, count in self.samples.most_common():
+                fh.write('{} {}\n'.format(';'.join(stack), count))
+
+    def __run(self):
+        while not self.__stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame))
+                frame = frame.f_back
+            self.samples[tuple(reversed(stack))] += 1
+
+
+class PipelineTimer(object):
+    '''
+    Runs a spaCy pipeline component by component, recording the wall time
+    of each one in `profiler.pipe_times`.
+
+    spaCy components are compiled, so they leave no Python frames of their
+    own and a sampled `nlp(text)` shows up as a single `Language.__call__`.
+    Running every component from `_run_component` instead labels the
+    samples taken inside it with the component name. The timer can be
+    called like the pipeline itself.
+    '''
+
+    def __init__(self, nlp, profiler):
+        '''
+        :param nlp: object of `spacy.language.Language`
+        :param profiler: object of `SamplingProfiler`
+        '''
+
+        self.__nlp = nlp
+        self.__profiler = profiler
+
+    @property
+    def vocab(self):
+        return self.__nlp.vocab
+
+    def __call__(self, text):
+        times = self.__profiler.pipe_times
+        doc = _run_component('tokenizer', self.__nlp.make_doc, text, times)
+        for name, component in self.__nlp.pipeline:
+            doc = _run_component(name, component, doc, times)
+        return doc
+
+
+def _run_component(name, component, data, times):
+    started = time.monotonic()
+    try:
+        return component(data)
+    finally:
+        times[name] += time.monotonic() - started
+
+
+def _label(frame):
+    '''
+    Helper function to label a sampled frame as `module:function`, or
+    `spacy.pipeline:<component>` for components run by `PipelineTimer`
+    '''
+
+    if frame.f_code is _run_component.__code__:
+        try:
+            return 'spacy.pipeline:{}'.format(frame.f_locals['name'])
+        except KeyError:
+            pass
+    return '{}:{}'.format(frame.f_globals.get('__name__', '?'),
+                          frame.f_code.co_name)
+
+
+def input_digest(data):
+    '''
+    Helper function to identify the profiled input
+
+    :param data: bytes or text of the profiled input
+    :return: hex sha1 digest of `data`
+    '''
+
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+@contextlib.contextmanager
+def profiled(label, digest, output_dir='profiles', interval=0.001):
+    '''
+    Run the enclosed block under a `SamplingProfiler` and save the
+    collapsed stacks as `<label>-<digest>-<timestamp>-<pid>-<n>.collapsed`,
+    along with the pipeline component times as `<...>.pipes.json` when the
+    block ran a `PipelineTimer`. The timestamp has microseconds and `n`
+    counts the profiles of the process, so retries of the same input do not
+    overwrite each other
+
+    :param label: name of the profiled entry point
+    :param digest: hash of the profiled input, see `input_digest`
+    :param output_dir: folder the profile is written to
+    :param interval: seconds between two samples
+    '''
+
+    profiler = SamplingProfiler(interval=interval)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        now = time.time()
+        filename = '{}-{}-{}{:06d}-{}-{}.collapsed'.format(label, digest,
+                time.strftime('%Y%m%d%H%M%S', time.localtime(now)),
+                int(now % 1 * 1e6), os.getpid(), next(_SEQUENCE))
+        profiler.path = os.path.join(output_dir, filename)
+        profiler.write_collapsed(profiler.path)
+
+        if profiler.pipe_times:
+            path = os.path.splitext(profiler.path)[0] + '.pipes.json'
+            with open(path, 'w', encoding='utf-8') as fh:
+                json.dump(dict(profiler.pipe_times), fh, indent=2,
+                          sort_keys=True)
@@ -0,0 +1,233 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import math
+import re
+import threading
+
+import numpy as np
+
+# relative weight of the features taken from each `parsed_doc` field
+FIELD_WEIGHTS = {
+    'skills': 1.0,
+    'profile': 0.5,
+    'qualification': 0.25,
+    }
+
+# weight of the experience match, added to the cosine similarity
+EXPERIENCE_WEIGHT = 0.2
+
+TERM = re.compile(r'\w+')
+
+
+def encode(parsed_doc):
+    '''
+    Helper function to encode the extracted details of a resume or job
+    description as sparse features
+
+    :param parsed_doc: dictionary returned by `Parser.get_extracted_data`
+    :return: dictionary of feature weights, L2 normalised
+    '''
+
+    features = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        values = parsed_doc.get(field) or []
+        if isinstance(values, str):
+            values = [values]
+
+        for value in values:
+            if field == 'skills':
+                terms = [value.lower().strip()]
+            else:
+                terms = TERM.findall(value.lower())
+            for term in terms:
+                features['{}:{}'.format(field, term)] = weight
+
+    norm = math.sqrt(sum(w * w for w in features.values()))
+    return {f: w / norm for (f, w) in features.items()} if norm else {}
+
+
+class _GrowableArray(object):
+    '''
+    Append-only NumPy array with amortised constant time appends
+    '''
+
+    def __init__(self, dtype, capacity=16):
+        self.__data = np.zeros(capacity, dtype=dtype)
+        self.size = 0
+
+    def append(self, value):
+        if self.size == len(self.__data):
+            data = np.zeros(2 * len(self.__data), dtype=self.__data.dtype)
+            data[:self.size] = self.__data
+            self.__data = data
+        self.__data[self.size] = value
+        self.size += 1
+
+    def __setitem__(self, index, value):
+        self.__data[index] = value
+
+    @property
+    def values(self):
+        return self.__data[:self.size]
+
+
+class ResumeIndex(object):
+    '''
+    Sparse feature matrix of the resumes in the collection, stored column
+    wise (one posting list of rows and weights per feature) so that a job
+    description is scored against every resume with one vectorised
+    accumulation per feature it contains.
+
+    Resumes are added incrementally as they are ingested; replacing or
+    removing a resume masks its old row, and the matrix is rebuilt from the
+    live rows once more than `compact_ratio` of the rows are masked.
+    '''
+
+    def __init__(self, compact_ratio=0.25):
+        '''
+        :param compact_ratio: fraction of masked rows triggering a rebuild
+        '''
+
+        self.compact_ratio = compact_ratio
+        self.__lock = threading.Lock()
+
+        self.__ids = []
+        self.__rows = {}
+        self.__features = []
+        self.__experience = _GrowableArray(np.float32)
+        self.__alive = _GrowableArray(bool)
+
+        self.__postings = {}
+        self.__document_frequency = {}
+
+    def __len__(self):
+        return len(self.__rows)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.__rows
+
+    def add(self, doc_id, parsed_doc):
+        '''
+        Add or replace a resume
+
+        :param doc_id: identifier of the stored document
+        :param parsed_doc: extracted details of the resume
+        '''
+
+        features = encode(parsed_doc)
+        experience = parsed_doc.get('total_experience') or 0
+
+        with self.__lock:
+            self.__remove(doc_id)
+            self.__append(doc_id, features, float(experience))
+
+    def remove(self, doc_id):
+        '''
+        Remove a resume from the ranking
+
+        :param doc_id: identifier of the stored document
+        '''
+
+        with self.__lock:
+            self.__remove(doc_id)
+
+    def rank(self, parsed_query, k=10):
+        '''
+        Score every resume against the extracted details of a job
+        description
+
+        :param parsed_query: extracted details of the job description
+        :param k: number of resumes to return
+        :return: list of (doc_id, score) tuples, best match first
+        '''
+
+        query = encode(parsed_query)
+        required = parsed_query.get('total_experience') or 0
+
+        with self.__lock:
+            if not self.__rows:
+                return []
+
+            experience = self.__experience.values
+            alive = self.__alive.values
+            scores = np.zeros(len(self.__ids), dtype=np.float32)
+
+            # idf weighting of the query, computed on the live collection
+            n = len(self.__rows)
+            for feature, weight in query.items():
+                df = self.__document_frequency.get(feature)
+                if not df:
+                    continue
+                rows, weights = self.__postings[feature]
+                idf = math.log((1 + n) / (1 + df)) + 1
+                scores[rows.values] += weights.values * (weight * idf)
+
+            # experience only adds to resumes matching the description,
+            # it must not rank resumes sharing no feature with it
+
+            if required > 0:
+                matched = scores > 0
+                scores[matched] += EXPERIENCE_WEIGHT * \
+                    np.minimum(experience[matched] / required, 1)
+
+            scores[~alive] = 0
+
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+
+            return [(self.__ids[row], float(scores[row])) for row in top
+                    if scores[row] > 0]
+
+    def __append(self, doc_id, features, experience):
+        row = len(self.__ids)
+        self.__ids.append(doc_id)
+        self.__rows[doc_id] = row
+        self.__features.append(features)
+        self.__experience.append(experience)
+        self.__alive.append(True)
+
+        for feature, weight in features.items():
+            if feature not in self.__postings:
+                self.__postings[feature] = (_GrowableArray(np.int64),
+                        _GrowableArray(np.float32))
+            rows, weights = self.__postings[feature]
+            rows.append(row)
+            weights.append(weight)
+            self.__document_frequency[feature] = \
+                self.__document_frequency.get(feature, 0) + 1
+
+    def __remove(self, doc_id):
+        row = self.__rows.pop(doc_id, None)
+        if row is None:
+            return
+
+        self.__alive[row] = False
+        for feature in self.__features[row]:
+            self.__document_frequency[feature] -= 1
+        self.__features[row] = None
+
+        masked = len(self.__ids) - len(self.__rows)
+        if masked > self.compact_ratio * len(self.__ids):
+            self.__compact()
+
+    def __compact(self):
+
+        # rebuild the matrix from the live rows, dropping the postings of
+        # replaced and removed resumes
+
+        live = [(doc_id, self.__features[row],
+                 float(self.__experience.values[row]))
+                for (doc_id, row) in sorted(self.__rows.items(),
+                                            key=lambda item: item[1])]
+
+        self.__ids = []
+        self.__rows = {}
+        self.__features = []
+        self.__experience = _GrowableArray(np.float32)
+        self.__alive = _GrowableArray(bool)
+        self.__postings = {}
+        self.__document_frequency = {}
+
+        for (doc_id, features, experience) in live:
+            self.__append(doc_id, features, experience)
@@ -0,0 +1,128 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+import functools
+
+
+class SkillMatcher(object):
+    '''
+    Typo tolerant lookup of tokens in the skills vocabulary.
+
+    Uses a SymSpell style deletion index: every skill is stored under all
+    the strings obtained by deleting up to `max_distance` characters from
+    it. A token is looked up by generating its own deletions, so candidate
+    skills are found with a handful of dictionary lookups instead of an
+    edit distance computation against the whole vocabulary. Candidates are
+    then verified with the optimal string alignment distance, which counts
+    a transposition ("pyhton") as a single edit.
+
+    Only tokens that are not `known_words` are fuzzy matched, so ordinary
+    words one edit away from a skill ("phone", "nesting") are left alone,
+    and the first letter of a token is never edited ("wining" is not
+    "mining"). Callers pass `fuzzy=False` for tokens that must only match
+    exactly, e.g. names and product names.
+    '''
+
+    def __init__(self, skills, known_words=(), max_distance=1,
+                 max_candidates=1, min_length=6, cache_size=65536):
+        '''
+        :param skills: iterable of lowercase skill names
+        :param known_words: iterable of lowercase words only matched exactly
+        :param max_distance: maximum edit distance of a fuzzy match
+        :param max_candidates: maximum number of skills returned per token
+        :param min_length: tokens shorter than this are only matched exactly
+        :param cache_size: number of token lookups kept in memory
+        '''
+
+        self.max_distance = max_distance
+        self.max_candidates = max_candidates
+        self.min_length = min_length
+
+        self.__skills = set(skills)
+        self.__known_words = frozenset(known_words)
+        self.__deletes = {}
+        for skill in self.__skills:
+            for variant in _deletes(skill, max_distance):
+                self.__deletes.setdefault(variant, set()).add(skill)
+
+        self.lookup = functools.lru_cache(maxsize=cache_size)(self.__lookup)
+
+    def __contains__(self, token):
+        return token in self.__skills
+
+    def __lookup(self, token, fuzzy=True):
+        '''
+        Find the skills matching a token
+
+        :param token: lowercase token or noun chunk
+        :param fuzzy: also match skills within `max_distance` edits
+        :return: tuple of matched skills, best match first
+        '''
+
+        # exact matches are the common case and skip the index entirely
+
+        if token in self.__skills:
+            return (token, )
+
+        if not fuzzy or len(token) < self.min_length \
+                or self.max_distance < 1 or token in self.__known_words:
+            return ()
+
+        candidates = set()
+        for variant in _deletes(token, self.max_distance):
+            candidates.update(self.__deletes.get(variant, ()))
+
+        matches = []
+        for skill in candidates:
+            if abs(len(skill) - len(token)) > self.max_distance \
+                    or skill[0] != token[0]:
+                continue
+            distance = _osa_distance(token, skill, self.max_distance)
+            if distance <= self.max_distance:
+
+                # on equal distance prefer skills spelled with the same
+                # letters, i.e. the token has transposed characters
+
+                anagram = sorted(skill) == sorted(token)
+                matches.append((distance, not anagram, skill))
+
+        matches.sort()
+        return tuple(skill for (_, _, skill) in
+                     matches[:self.max_candidates])
+
+
+def _deletes(word, max_distance):
+    '''
+    Helper function to generate all strings obtained by deleting up to
+    `max_distance` characters from `word`, including `word` itself
+    '''
+
+    variants = {word}
+    edge = {word}
+    for _ in range(max_distance):
+        edge = {w[:i] + w[i + 1:] for w in edge if len(w) > 1
+                for i in range(len(w))}
+        variants |= edge
+    return variants
+
+
+def _osa_distance(a, b, max_distance):
+    '''
+    Helper function to compute the optimal string alignment distance,
+    giving up early once it is certain to exceed `max_distance`
+    '''
+
+    two_back = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] \
+                    and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], two_back[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        two_back, previous = previous, current
+    return previous[-1]
@@ -115,8 +115,7 @@ def convert_dataturks_to_spacy(dataturks_json_file_path):
         return None
 
 
-TRAIN_DATA = \
-    trim_entity_spans(convert_dataturks_to_spacy('data/train.json'))
+TRAIN_DATA_PATH = 'data/train.json'
 
 
 @plac.annotations(
@@ -134,6 +133,11 @@ def main(
     """Set up the pipeline and entity recognizer, and train the new entity."""
 
     random.seed(0)
+
+    # read the annotations here rather than at import time
+    train_data = \
+        trim_entity_spans(convert_dataturks_to_spacy(TRAIN_DATA_PATH))
+
     if model is not None:
         nlp = spacy.load(model)  # load existing spaCy model
         print("Loaded model '%s'" % model)
@@ -153,7 +157,7 @@ def main(
         ner = nlp.get_pipe('ner')
 
     # add labels
-    for (_, annotations) in TRAIN_DATA:
+    for (_, annotations) in train_data:
         for ent in annotations.get('entities'):
             if ent[2] == "Links":
                 continue
@@ -175,9 +179,9 @@ def main(
 
         # batch up the examples using spaCy's minibatch
         for itn in range(n_iter):
-            random.shuffle(TRAIN_DATA)
+            random.shuffle(train_data)
             losses = {}
-            for text, annotations in TRAIN_DATA:
+            for text, annotations in train_data:
                 nlp.update([text], [annotations], sgd=optimizer, drop=0.35, losses=losses)
             
             print('Losses', losses)
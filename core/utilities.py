@@ -1,22 +1,15 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
+import csv
+import functools
 import io
 import os
 import re
 
 from datetime import datetime
-from dateutil import relativedelta
-
-import pandas as pd
-
-from pdfminer.converter import TextConverter
-from pdfminer.pdfinterp import PDFPageInterpreter
-from pdfminer.pdfinterp import PDFResourceManager
-from pdfminer.layout import LAParams
-from pdfminer.pdfpage import PDFPage
-from pdfminer.pdfparser import PDFSyntaxError
 
 from . import keywords as kw
+from .skill_matcher import SkillMatcher
 
 
 def extract_text_from_pdf(pdf_path):
@@ -27,6 +20,14 @@ def extract_text_from_pdf(pdf_path):
     :return: iterator of string of extracted text
     '''
 
+    # pdfminer is imported on first use to keep `import core` fast
+    from pdfminer.converter import TextConverter
+    from pdfminer.pdfinterp import PDFPageInterpreter
+    from pdfminer.pdfinterp import PDFResourceManager
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFSyntaxError
+
     # https://www.blog.pythonlibrary.org/2018/05/03/exporting-data-from-pdfs-with-python/
     if not isinstance(pdf_path, io.BytesIO):
 
@@ -153,35 +154,86 @@ def extract_name(nlp_text, matcher):
             return span.text
 
 
-def extract_skills(nlp_text, noun_chunks):
+@functools.lru_cache(maxsize=None)
+def get_skill_matcher(max_distance=1, max_candidates=1, cache_size=65536):
+    '''
+    Helper function to build the typo tolerant matcher over the skills
+    vocabulary, built once per configuration
+
+    `data/words.txt` lists the common English words that are never fuzzy
+    matched: the lowercase words of 4 or more letters with a log
+    probability above -16.5 in the `en_lexeme_prob` table of
+    spacy-lookups-data.
+
+    :param max_distance: maximum edit distance of a fuzzy match
+    :param max_candidates: maximum number of skills matched per token
+    :param cache_size: number of token lookups kept in memory
+    :return: object of `skill_matcher.SkillMatcher`
+    '''
+
+    # the vocabulary is the header row of the file
+    with open(os.path.join(os.path.dirname(__file__), 'data/skills.csv'),
+              'r', encoding='utf-8', newline='') as fh:
+        skills = next(csv.reader(fh))
+
+    with open(os.path.join(os.path.dirname(__file__), 'data/words.txt'),
+              'r', encoding='utf-8') as fh:
+        known_words = fh.read().split()
+
+    return SkillMatcher(skills, known_words=known_words,
+                        max_distance=max_distance,
+                        max_candidates=max_candidates,
+                        cache_size=cache_size)
+
+
+def may_be_misspelled(token):
+    '''
+    Helper function to tell whether a token may be a misspelled word,
+    rather than a name spelled on purpose
+
+    :param token: object of `spacy.tokens.token.Token`
+    :return: True if the token may be fuzzy matched
+    '''
+
+    text = token.text
+    return token.pos_ != 'PROPN' and not token.ent_type_ \
+        and (text.islower() or text.istitle() or text.isupper())
+
+
+def extract_skills(nlp_text, noun_chunks, skill_matcher=None):
     '''
     Helper function to extract skills from spacy nlp text
 
+    Only tokens that may be misspelled words are fuzzy matched; proper
+    nouns, named entities (e.g. the candidate's name) and mixed case
+    product names ("TestNG", "UiPath") only match a skill exactly.
+
     :param nlp_text: object of `spacy.tokens.doc.Doc`
     :param noun_chunks: noun chunks extracted from nlp text
+    :param skill_matcher: object of `skill_matcher.SkillMatcher`, defaults
+                          to `get_skill_matcher()`
     :return: list of skills extracted
     '''
 
-    tokens = [token.text for token in nlp_text if not token.is_stop]
-    data = pd.read_csv(os.path.join(os.path.dirname(__file__),
-                       'data/skills.csv'))
+    if skill_matcher is None:
+        skill_matcher = get_skill_matcher()
 
-    skills = list(data.columns.values)
+    tokens = [token for token in nlp_text if not token.is_stop]
     skillset = []
 
     # check for one-grams
     for token in tokens:
-        if token.lower() in skills:
-            skillset.append(token)
+        skillset.extend(skill_matcher.lookup(token.text.lower(),
+                                             fuzzy=may_be_misspelled(token)))
 
     # check for bi-grams and tri-grams
-    for token in noun_chunks:
-        token = token.text.lower().strip()
-        if token in skills:
-            skillset.append(token)
+    for span in noun_chunks:
+        fuzzy = all(may_be_misspelled(token) for token in span)
+        skillset.extend(skill_matcher.lookup(span.text.lower().strip(),
+                                             fuzzy=fuzzy))
 
-        return [i.capitalize() for i in set([i.lower() for i in
-                skillset])]
+    return [i.capitalize() for i in set([i.lower() for i in
+            skillset])]
 
 
 def extract_sections(text):
@@ -217,6 +269,21 @@ def extract_sections(text):
     return entities
 
 
+def extract_required_experience(text):
+    '''
+    Helper function to extract the years of experience a job description
+    asks for
+
+    :param text: plain text of the job description
+    :return: required years of experience, 0 if none is mentioned
+    '''
+
+    years = [float(match.group('years'))
+             for pattern in (kw.YEARS_OF_EXPERIENCE, kw.EXPERIENCE_OF_YEARS)
+             for match in re.finditer(pattern, text, re.I)]
+    return max(years) if years else 0
+
+
 def get_total_experience(experience_list):
     '''
     Wrapper function to extract total months of experience from a resume
@@ -247,6 +314,8 @@ def get_number_of_months_from_dates(date1, date2):
     :return: months of experience from date1 to date2
     '''
 
+    from dateutil import relativedelta
+
     if date2.lower() == 'present':
         date2 = datetime.now().strftime('%b %Y')
 
@@ -1,13 +1,34 @@
-from flask_pymongo import pymongo
+import threading
 
 # secure connection url
 __url__ = "insert mongo client authentication url"
 
-# mongodb atlas client
-client = pymongo.MongoClient(__url__)
+_lock = threading.Lock()
 
-# db and collection
-db = pymongo.uri_parser.parse_uri(__url__)
 
-atlas = client.get_database('flask_mongodb_atlas')
-collection = pymongo.collection.Collection(atlas, 'resume_collection')
+def _connect():
+    from flask_pymongo import pymongo
+
+    # mongodb atlas client
+    client = pymongo.MongoClient(__url__)
+
+    # db and collection
+    db = pymongo.uri_parser.parse_uri(__url__)
+
+    atlas = client.get_database('flask_mongodb_atlas')
+    collection = pymongo.collection.Collection(atlas, 'resume_collection')
+
+    return {'client': client, 'db': db, 'atlas': atlas, 'collection': collection}
+
+
+def __getattr__(name):
+    # the client is created on first use, so that importing the app (worker
+    # boot, flask CLI) neither imports pymongo nor parses the connection url
+    if name not in ('client', 'db', 'atlas', 'collection'):
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    with _lock:
+        if name not in globals():
+            globals().update(_connect())
+
+    return globals()[name]
@@ -1,4 +1,8 @@
+import datetime
 import os
+import threading
+
+import click
 
 from flask import Flask
 
@@ -15,27 +19,209 @@ from flask import (
 
 from werkzeug.utils import secure_filename
 
-import spacy
-
-from core import entity_recognizer
+from core import entity_recognizer, profiling, utilities
+from core.batching import InferenceExecutor
+from bson.objectid import ObjectId
 import db_connection
 
 UPLOAD_FOLDER = 'uploads/'
 ALLOWED_EXTENSIONS = {'pdf'}
+PROFILE_FOLDER = 'profiles/'
+DEDUP_INDEX = 'dedup/lsh.journal'
+EXPORT_FOLDER = 'exports/'
+
+# micro-batching of concurrent inference requests
+INFERENCE_MAX_LATENCY = 0.005 # seconds a request may wait for a batch to fill
+INFERENCE_MAX_BATCH = 32
+
+# number of resumes returned for a job description
+RANKING_TOP_K = 10
+# seconds of inserts read again when catching up with the collection, ids
+# made by other workers within the same seconds are not ordered
+RANKING_SYNC_MARGIN = 60
 
 class AppServer(Flask):
     def __init__(self, *args, **kwargs):
         super(AppServer, self).__init__(*args, **kwargs)
-        self.nlp = spacy.load("en_core_web_sm")
+
+        # models, executors and indexes are created on first use, so that
+        # importing the app (worker boot, flask CLI) stays fast
+        self.__resources = {}
+        self.__resources_lock = threading.RLock()
+
+        # ranking index over the collection, built on first use
+        self.resume_index = None
+        self.resume_index_lock = threading.Lock()
+        self.resume_index_synced = None
+
+    def __resource(self, name, factory):
+        if name not in self.__resources:
+            with self.__resources_lock:
+                if name not in self.__resources:
+                    self.__resources[name] = factory()
+        return self.__resources[name]
+
+    def loaded(self, name):
+        # the resource if it was already created, without creating it
+        return self.__resources.get(name)
+
+    @staticmethod
+    def __load_model(name):
+        import spacy
+        return spacy.load(name)
+
+    @property
+    def nlp(self):
+        return self.__resource("nlp", lambda: self.__load_model("en_core_web_sm"))
+
+    @property
+    def entity_recognizer(self):
+        return self.__resource("entity_recognizer",
+            lambda: self.__load_model(entity_recognizer.MODEL_PATH))
+
+    # executors shared by the upload and rank paths, batching full resume
+    # and job description texts
+    @property
+    def nlp_executor(self):
+        return self.__resource("nlp_executor", lambda: InferenceExecutor(self.nlp,
+            max_latency=INFERENCE_MAX_LATENCY, max_batch=INFERENCE_MAX_BATCH))
+
+    @property
+    def entity_executor(self):
+        return self.__resource("entity_executor", lambda: InferenceExecutor(self.entity_recognizer,
+            max_latency=INFERENCE_MAX_LATENCY, max_batch=INFERENCE_MAX_BATCH))
+
+    # search queries are batched on their own, so that they do not wait
+    # behind the resumes being parsed
+    @property
+    def query_executor(self):
+        return self.__resource("query_executor", lambda: InferenceExecutor(self.nlp,
+            max_latency=INFERENCE_MAX_LATENCY, max_batch=INFERENCE_MAX_BATCH))
+
+    # near-duplicate detection of uploads, persisted locally
+    @property
+    def dedup_index(self):
+        from core import dedup
+        return self.__resource("dedup_index", lambda: dedup.LSHIndex(DEDUP_INDEX))
 
 app = AppServer(__name__, template_folder='web/templates', static_folder='web/static')
 
 # helper functions
-def update_metadata(document):
+def update_metadata(document, text=None):
+    # returns the id of the stored near-duplicate the document was linked to
+    from core import dedup
+
+    # no signature for texts too short to compare (e.g. scanned PDFs)
+    signature = dedup.minhash_signature(text) if text is not None else None
+    if signature is not None:
+        # stored with the record, so that `flask dedupe` can rebuild the index
+        # without the uploaded files
+        document["minhash"] = signature.tobytes()
+
+        match = app.dedup_index.query(signature)
+        while match is not None:
+            doc_id = match[0]
+            try:
+                linked = link_duplicate(doc_id, document)
+            except Exception as e:
+                print(e)
+                return None
+
+            if linked:
+                app.dedup_index.insert(doc_id, signature)
+                with app.resume_index_lock:
+                    if app.resume_index is not None:
+                        app.resume_index.add(doc_id, document["parsed_doc"])
+                return doc_id
+
+            # the near-duplicate was deleted from the collection, another one
+            # may still be stored
+            app.dedup_index.remove(doc_id)
+            match = app.dedup_index.query(signature)
+
     try:
-        db_connection.atlas.collection.insert_one(document)
+        result = db_connection.atlas.collection.insert_one(document)
     except Exception as e:
         print(e)
+        return None
+
+    doc_id = str(result.inserted_id)
+    if signature is not None:
+        app.dedup_index.insert(doc_id, signature)
+
+    with app.resume_index_lock:
+        if app.resume_index is not None:
+            app.resume_index.add(doc_id, document["parsed_doc"])
+
+    return None
+
+def link_duplicate(doc_id, document):
+    # the latest submission replaces the stored one, earlier filenames are kept
+    stored = db_connection.atlas.collection.find_one({"_id": ObjectId(doc_id)}, {"filename": 1})
+    if stored is None:
+        return False
+
+    previous = [stored["filename"]] + document.get("duplicates", [])
+
+    latest = {"filename": document["filename"], "parsed_doc": document["parsed_doc"]}
+    if document.get("minhash") is not None:
+        latest["minhash"] = document["minhash"]
+
+    db_connection.atlas.collection.update_one({"_id": ObjectId(doc_id)}, {
+        "$set": latest,
+        "$addToSet": {"duplicates": {"$each": previous}},
+    })
+    return True
+
+def stored_signature(record):
+    # signature of a stored record: saved on the record at ingest, else
+    # computed from the uploaded file, else the one already in the index
+    # (`uploads/` does not outlive a dyno restart)
+    from core import dedup
+
+    if record.get("minhash") is not None:
+        return dedup.signature_from_bytes(record["minhash"])
+
+    location = os.path.join(UPLOAD_FOLDER, record["filename"])
+    if os.path.exists(location):
+        text = utilities.extract_text(location, os.path.splitext(location)[1])
+        return dedup.minhash_signature(' '.join(text.split()))
+
+    return app.dedup_index.get(str(record["_id"]))
+
+def parse_and_store(location, filename, nlp, ner):
+    # parse and extract document features
+    parser = entity_recognizer.Parser(location, nlp=nlp, entity_recognizer=ner)
+    parsed_doc = parser.get_extracted_data()
+
+    duplicate_of = update_metadata({"filename": filename, "parsed_doc": parsed_doc},
+                                   text=parser.get_extracted_text())
+    return parsed_doc, duplicate_of
+
+def get_resume_index():
+    # the index is per worker: the stored resumes are loaded on first use, and
+    # the resumes inserted since by any worker are read on every call. Records
+    # replaced in place by other workers (linked near-duplicates, `flask
+    # dedupe`) keep their previous details until the worker restarts
+    from core import ranking
+
+    with app.resume_index_lock:
+        if app.resume_index is None:
+            app.resume_index = ranking.ResumeIndex()
+
+        query = {}
+        if app.resume_index_synced is not None:
+            since = app.resume_index_synced.generation_time - \
+                datetime.timedelta(seconds=RANKING_SYNC_MARGIN)
+            query = {"_id": {"$gt": ObjectId.from_datetime(since)}}
+
+        for record in db_connection.atlas.collection.find(query, {"parsed_doc": 1}).sort("_id", 1):
+            doc_id = str(record["_id"])
+            if doc_id not in app.resume_index:
+                app.resume_index.add(doc_id, record.get("parsed_doc") or {})
+            app.resume_index_synced = record["_id"]
+
+        return app.resume_index
 
 def upload_to_google_cloud(file, filename):
     pass
@@ -44,6 +230,11 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def profiling_requested():
+    # opt-in per request with the `X-Profile: 1` header or `?profile=1`
+    return request.headers.get('X-Profile') == '1' or \
+           request.args.get('profile') == '1'
+
 
 #test database connectivity
 @app.route("/connection")
@@ -51,6 +242,16 @@ def test():
     db_name = db_connection.db['database']
     return render_template("test.html", db=db_name)
 
+@app.route("/metrics/inference")
+def inference_metrics():
+    # a scrape must not start the executors, that would load both models
+    metrics = {}
+    for (key, name) in [("nlp", "nlp_executor"), ("entity_recognizer", "entity_executor"),
+                        ("query", "query_executor")]:
+        executor = app.loaded(name)
+        metrics[key] = executor.get_metrics() if executor is not None else {}
+    return jsonify(**metrics)
+
 @app.route("/no-result-found")
 def unknown():
     return render_template("unknown.html")	
@@ -60,12 +261,16 @@ def home():
     if request.method == "POST":
         try:
             query = request.form['query']
-            query_result = handle_search(query)
-            if query_result is not None:
-                records, count = query_result
-                return display_result(records, count)
-            
-            return render_template("unknown.html")
+
+            if profiling_requested():
+                # bypass the batching executor so the spaCy components are
+                # sampled on this request's own thread, and render inside the
+                # profile so iterating the Mongo cursor is covered too
+                with profiling.profiled('search', profiling.input_digest(query),
+                                        PROFILE_FOLDER) as profiler:
+                    return search(query, nlp=profiling.PipelineTimer(app.nlp, profiler))
+
+            return search(query)
         
         except Exception as e:
             return print(e)
@@ -73,6 +278,15 @@ def home():
     return render_template("index.html")
 
 
+def search(query, nlp=None):
+    query_result = handle_search(query, nlp=nlp)
+    if query_result is not None:
+        records, count = query_result
+        return display_result(records, count)
+
+    return render_template("unknown.html")
+
+
 @app.route('/result')
 def display_result(records, count):
     return render_template("result.html", records=records, count=count)
@@ -110,17 +324,68 @@ def handle_upload():
             file.save(location)
             file_size = os.path.getsize(location)
 
-            # parse and extract document features
-            parsed_doc = entity_recognizer.extraction_wrapper(location)
+            if profiling_requested():
+                with open(location, 'rb') as fh:
+                    digest = profiling.input_digest(fh.read())
 
-            update_metadata({"filename": filename, "parsed_doc": parsed_doc})
+                with profiling.profiled('upload', digest, PROFILE_FOLDER) as profiler:
+                    return upload(location, filename, file_size,
+                        profiling.PipelineTimer(app.nlp, profiler),
+                        profiling.PipelineTimer(app.entity_recognizer, profiler))
 
-            return jsonify(name=filename, size=file_size, result={"status": "Successfully parsed document and uploaded reference to Atlas cluster", "parsed_doc": parsed_doc})
+            return upload(location, filename, file_size,
+                          app.nlp_executor, app.entity_executor)
         
         return jsonify(name="lost", size="in bits", result={"status": "Network error uploading the file"})
     
     return render_template("collection.html")
 
+def upload(location, filename, file_size, nlp, ner):
+    parsed_doc, duplicate_of = parse_and_store(location, filename, nlp, ner)
+
+    if duplicate_of is not None:
+        return jsonify(name=filename, size=file_size, result={"status": "Linked document to an existing near-duplicate in the Atlas cluster", "duplicate_of": duplicate_of, "parsed_doc": parsed_doc})
+
+    return jsonify(name=filename, size=file_size, result={"status": "Successfully parsed document and uploaded reference to Atlas cluster", "parsed_doc": parsed_doc})
+
+@app.route('/rank', methods=['GET', 'POST'])
+def handle_rank():
+
+    if request.method == "POST":
+        job_description = request.form['job_description']
+
+        # the job description goes through the same extractors as resumes
+        parsed_query = entity_recognizer.text_extraction_wrapper(job_description,
+            nlp=app.nlp_executor, entity_recognizer=app.entity_executor)
+
+        # resumes state their experience as date ranges, job descriptions
+        # as a number of years
+        parsed_query["total_experience"] = \
+            utilities.extract_required_experience(job_description)
+
+        index = get_resume_index()
+        while True:
+            ranked = index.rank(parsed_query, k=RANKING_TOP_K)
+            if not ranked:
+                return render_template("unknown.html")
+
+            ids = [ObjectId(doc_id) for (doc_id, _) in ranked]
+            found = {record["_id"]: record for record in
+                     db_connection.atlas.collection.find({"_id": {"$in": ids}})}
+            if len(found) == len(ids):
+                break
+
+            # deleted by another process (e.g. `flask dedupe`), rank again
+            # without them
+            for i in ids:
+                if i not in found:
+                    index.remove(str(i))
+
+        records = [found[i] for i in ids]
+        return display_result(records, len(records))
+
+    return render_template("rank.html")
+
 def prepare(query_params):
     # prepare and return query statement from the list of entity tuples received..
     pass
@@ -132,9 +397,11 @@ def execute(query_statement):
     print("success: ", records)
     return (records, records_count)
 
-def handle_search(query):
+def handle_search(query, nlp=None):
     print("query received: {}".format(query))
-    doc = app.nlp(query)
+    if nlp is None:
+        nlp = app.query_executor
+    doc = nlp(query)
 
     query_params = list()
     
@@ -149,6 +416,67 @@ def handle_search(query):
     
     return None
 
+@app.cli.command("dedupe")
+def dedupe_collection():
+    """Link the near-duplicate resumes already stored in the collection."""
+    from core import dedup
+
+    collection = db_connection.atlas.collection
+
+    # rebuilt in memory and swapped in at the end, so that the signatures
+    # read from the current index stay available during the pass
+    index = dedup.LSHIndex()
+    signatures = {}
+    linked = 0
+    unsigned = 0
+
+    # oldest first, so later submissions are merged into the earliest record
+    fields = {"filename": 1, "parsed_doc": 1, "duplicates": 1, "minhash": 1}
+    for record in collection.find({}, fields).sort("_id", 1):
+        signature = stored_signature(record)
+        if signature is None:
+            unsigned += 1
+            continue
+
+        # records stored before signatures were saved with them
+        if record.get("minhash") is None:
+            record["minhash"] = signature.tobytes()
+            collection.update_one({"_id": record["_id"]}, {"$set": {"minhash": record["minhash"]}})
+
+        match = index.query(signature)
+        if match is None:
+            index.insert(str(record["_id"]), signature)
+            signatures[str(record["_id"])] = signature
+            continue
+
+        link_duplicate(match[0], record)
+        collection.delete_one({"_id": record["_id"]})
+        index.insert(match[0], signature)
+        signatures[match[0]] = signature
+        linked += 1
+
+    app.dedup_index.clear()
+    for doc_id, signature in signatures.items():
+        app.dedup_index.insert(doc_id, signature)
+    app.dedup_index.compact()
+
+    print("Linked {} near-duplicate documents".format(linked))
+    if unsigned:
+        print("Skipped {} documents without a signature (text too short, or "
+              "stored before signatures were saved and upload missing)".format(unsigned))
+
+@app.cli.command("export")
+@click.option("--output-dir", default=EXPORT_FOLDER, help="Root folder of the Parquet dataset.")
+@click.option("--batch-size", default=1000, help="Documents per record batch.")
+@click.option("--full", is_flag=True, help="Replace the previous export with every document.")
+def export_collection(output_dir, batch_size, full):
+    """Export the parsed resumes to Parquet files partitioned by ingest date."""
+    from core import export
+
+    exported = export.export_collection(db_connection.atlas.collection, output_dir,
+                                        batch_size=batch_size, incremental=not full)
+    print("Exported {} documents to {}".format(exported, output_dir))
+
 if __name__ == "__main__":
     app.secret_key = 'super secret key'
     app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
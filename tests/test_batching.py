@@ -0,0 +1,39 @@
+import pytest
+
+from core.batching import InferenceExecutor
+
+
+class FakePipeline(object):
+    vocab = None
+
+    def __call__(self, text):
+        if text == 'boom':
+            raise ValueError('text too long')
+        return text.upper()
+
+    def pipe(self, texts, batch_size=None):
+        return [self(text) for text in texts]
+
+
+def test_batches_concurrent_requests():
+    executor = InferenceExecutor(FakePipeline(), max_latency=0.05,
+                                 max_batch=8)
+    futures = [executor.submit(text) for text in ['a', 'b', 'c']]
+
+    assert [f.result(timeout=5) for f in futures] == ['A', 'B', 'C']
+    assert executor.get_metrics()['requests'] == 3
+
+
+def test_failing_text_only_fails_its_own_request():
+    executor = InferenceExecutor(FakePipeline(), max_latency=0.05,
+                                 max_batch=8)
+    a, boom, b = [executor.submit(text) for text in ['a', 'boom', 'b']]
+
+    assert a.result(timeout=5) == 'A'
+    assert b.result(timeout=5) == 'B'
+    with pytest.raises(ValueError):
+        boom.result(timeout=5)
+
+    metrics = executor.get_metrics()
+    assert metrics['requests'] == 2
+    assert metrics['errors'] == 1
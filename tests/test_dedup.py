@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from core import dedup
+
+
+@pytest.fixture(scope='module')
+def texts():
+    generator = random.Random(0)
+    words = ['word{}'.format(i) for i in range(2000)]
+    return [' '.join(generator.choice(words) for _ in range(300))
+            for _ in range(20)]
+
+
+def test_near_duplicate_is_found(texts):
+    index = dedup.LSHIndex()
+    for i, text in enumerate(texts):
+        index.insert(str(i), dedup.minhash_signature(text))
+
+    words = texts[7].split()
+    words[10] = 'edited'
+    match = index.query(dedup.minhash_signature(' '.join(words)))
+
+    assert match is not None and match[0] == '7'
+
+
+def test_unrelated_text_is_not_a_duplicate(texts):
+    index = dedup.LSHIndex()
+    index.insert('a', dedup.minhash_signature(texts[0]))
+
+    assert index.query(dedup.minhash_signature(texts[1])) is None
+
+
+@pytest.mark.parametrize('text', ['', '   ', 'John Doe', 'Resume of John Doe'])
+def test_short_texts_have_no_signature(text):
+    assert dedup.minhash_signature(text) is None
+
+
+def test_journal_is_shared_between_indexes(tmp_path, texts):
+    path = str(tmp_path / 'lsh.journal')
+    writer = dedup.LSHIndex(path)
+    reader = dedup.LSHIndex(path)
+
+    writer.insert('a', dedup.minhash_signature(texts[0]))
+    assert reader.query(dedup.minhash_signature(texts[0]))[0] == 'a'
+
+    writer.remove('a')
+    writer.compact()
+    assert reader.query(dedup.minhash_signature(texts[0])) is None
+
+
+def test_signature_round_trips_through_bytes(texts):
+    signature = dedup.minhash_signature(texts[0])
+    stored = dedup.signature_from_bytes(signature.tobytes())
+
+    assert (stored == signature).all()
+
+    index = dedup.LSHIndex()
+    index.insert('a', stored)
+    assert (index.get('a') == signature).all()
+    assert index.get('b') is None
@@ -0,0 +1,124 @@
+import datetime
+import os
+
+import pytest
+
+pq = pytest.importorskip('pyarrow.parquet')
+ds = pytest.importorskip('pyarrow.dataset')
+
+from bson.objectid import ObjectId
+
+from core import export
+
+
+class FakeCursor(list):
+
+    def sort(self, key, direction):
+        return FakeCursor(sorted(self, key=lambda record: record[key]))
+
+    def batch_size(self, size):
+        return self
+
+
+class FakeCollection(object):
+
+    def __init__(self):
+        self.documents = []
+
+    def insert(self, day, skills):
+        _id = ObjectId.from_datetime(datetime.datetime(2026, 10, day))
+        _id = ObjectId(str(_id)[:16] + '{:08x}'.format(len(self.documents)))
+        self.documents.append({'_id': _id, 'filename': 'resume.pdf',
+                               'parsed_doc': {'name': 'Jane Doe',
+                                              'skills': skills,
+                                              'profile': 'Engineer',
+                                              'total_experience': 2.5}})
+
+    def find(self, query, projection):
+        after = query.get('_id', {}).get('$gt')
+        return FakeCursor(d for d in self.documents
+                          if after is None or d['_id'] > after)
+
+
+def read(output_dir):
+    return ds.dataset(str(output_dir), format='parquet',
+                      partitioning='hive').to_table()
+
+
+def test_incremental_and_full_export(tmp_path):
+    collection = FakeCollection()
+    collection.insert(1, ['Python'])
+    assert export.export_collection(collection, str(tmp_path)) == 1
+
+    collection.insert(2, ['Django'])
+    collection.insert(2, None)
+    assert export.export_collection(collection, str(tmp_path)) == 2
+    assert export.export_collection(collection, str(tmp_path)) == 0
+
+    table = read(tmp_path)
+    assert table.num_rows == 3
+    assert table.column('skills').to_pylist() == \
+        [['Python'], ['Django'], None]
+    assert table.column('profile').to_pylist()[0] == ['Engineer']
+
+    assert export.export_collection(collection, str(tmp_path),
+                                    incremental=False) == 3
+    assert read(tmp_path).num_rows == 3
+
+
+def test_only_one_partition_file_is_open(tmp_path, monkeypatch):
+    collection = FakeCollection()
+    for day in range(1, 11):
+        collection.insert(day, ['Python'])
+
+    opened = []
+    writer = pq.ParquetWriter
+
+    class CountingWriter(writer):
+
+        def __init__(self, *args, **kwargs):
+            super(CountingWriter, self).__init__(*args, **kwargs)
+            opened.append(self)
+
+        def close(self):
+            opened.remove(self)
+            super(CountingWriter, self).close()
+
+        def write_table(self, *args, **kwargs):
+            assert len(opened) == 1
+            super(CountingWriter, self).write_table(*args, **kwargs)
+
+    monkeypatch.setattr(export.pq, 'ParquetWriter', CountingWriter)
+
+    assert export.export_collection(collection, str(tmp_path),
+                                    batch_size=4) == 10
+    assert opened == []
+    assert read(tmp_path).num_rows == 10
+
+
+def test_failed_full_export_keeps_previous_export(tmp_path, monkeypatch):
+    collection = FakeCollection()
+    for day in range(1, 4):
+        collection.insert(day, ['Python'])
+    assert export.export_collection(collection, str(tmp_path)) == 3
+    watermark = export.read_watermark(str(tmp_path))
+
+    def fail(record):
+        raise RuntimeError('connection lost')
+
+    monkeypatch.setattr(export, '_to_row', fail)
+    with pytest.raises(RuntimeError):
+        export.export_collection(collection, str(tmp_path),
+                                 incremental=False)
+
+    assert read(tmp_path).num_rows == 3
+    assert export.read_watermark(str(tmp_path)) == watermark
+
+    monkeypatch.undo()
+    collection.documents.pop()
+    assert export.export_collection(collection, str(tmp_path),
+                                    incremental=False) == 2
+    assert read(tmp_path).num_rows == 2
+    assert sorted(os.listdir(str(tmp_path))) == \
+        ['_watermark.json', 'ingest_date=2026-10-01',
+         'ingest_date=2026-10-02']
@@ -0,0 +1,43 @@
+import pytest
+
+from core.importtime import IMPORT_BUDGETS, measure, subtree, total
+
+
+def test_subtree_drops_interpreter_startup():
+    timings = [
+        ('encodings.aliases', 0.001, 0.001, 1),
+        ('encodings', 0.002, 0.003, 0),
+        ('site', 0.004, 0.004, 0),
+        ('core', 0.001, 0.001, 0),
+        ('re', 0.002, 0.002, 1),
+        ('core.utilities', 0.003, 0.005, 0),
+    ]
+
+    assert [name for (name, _, _, _) in
+            subtree(timings, 'core.utilities')] == \
+        ['core', 're', 'core.utilities']
+    assert total(timings, 'core.utilities') == 0.006
+
+
+def check_budget(module):
+    elapsed = total(measure(module), module)
+    assert elapsed <= IMPORT_BUDGETS[module], \
+        '{} imported in {:.3f}s'.format(module, elapsed)
+
+
+def test_core_import_within_budget():
+    check_budget('core')
+
+
+def test_server_import_within_budget():
+    pytest.importorskip('flask')
+    pytest.importorskip('flask_pymongo')
+    check_budget('server')
+
+
+def test_server_import_does_not_load_models():
+    pytest.importorskip('flask')
+    pytest.importorskip('flask_pymongo')
+    names = {name for (name, _, _, _) in measure('server')}
+    assert 'spacy' not in names
+    assert 'pymongo' not in names
@@ -0,0 +1,61 @@
+import json
+import os
+import time
+
+from core import profiling
+
+
+class FakeDoc(list):
+    pass
+
+
+class FakePipeline(object):
+    vocab = None
+
+    def make_doc(self, text):
+        return FakeDoc(text.split())
+
+    @property
+    def pipeline(self):
+        return [('tagger', self.tagger), ('ner', self.ner)]
+
+    def tagger(self, doc):
+        return doc
+
+    def ner(self, doc):
+        started = time.monotonic()
+        while time.monotonic() - started < 0.1:
+            pass
+        return doc
+
+
+def test_profile_labels_pipeline_components(tmp_path):
+    digest = profiling.input_digest('some query')
+
+    with profiling.profiled('search', digest, str(tmp_path)) as profiler:
+        nlp = profiling.PipelineTimer(FakePipeline(), profiler)
+        assert nlp('some query') == ['some', 'query']
+
+    assert os.path.basename(profiler.path).startswith('search-' + digest)
+    with open(profiler.path, encoding='utf-8') as fh:
+        stacks = fh.read()
+    assert 'spacy.pipeline:ner' in stacks
+
+    pipes_path = os.path.splitext(profiler.path)[0] + '.pipes.json'
+    with open(pipes_path, encoding='utf-8') as fh:
+        times = json.load(fh)
+    assert set(times) == {'tokenizer', 'tagger', 'ner'}
+    assert times['ner'] >= 0.1
+
+
+def test_profiles_of_the_same_input_do_not_overwrite(tmp_path):
+    digest = profiling.input_digest('some query')
+
+    paths = set()
+    for _ in range(3):
+        with profiling.profiled('search', digest, str(tmp_path)) as profiler:
+            pass
+        paths.add(profiler.path)
+
+    assert len(paths) == 3
+    assert len(os.listdir(str(tmp_path))) == 3
@@ -0,0 +1,63 @@
+import pytest
+
+from core import utilities
+from core.ranking import ResumeIndex
+
+
+def resume(skills, experience=0):
+    return {'skills': skills, 'profile': None,
+            'qualification': None, 'total_experience': experience}
+
+
+def test_rank_orders_by_skill_overlap():
+    index = ResumeIndex()
+    index.add('a', resume(['Python', 'Django', 'Flask']))
+    index.add('b', resume(['Python']))
+    index.add('c', resume(['Java']))
+
+    ranked = index.rank(resume(['Python', 'Django']), k=3)
+
+    assert [doc_id for (doc_id, _) in ranked] == ['a', 'b']
+
+
+def test_experience_breaks_ties():
+    index = ResumeIndex()
+    index.add('junior', resume(['Python'], experience=1))
+    index.add('senior', resume(['Python'], experience=6))
+
+    ranked = index.rank(resume(['Python'], experience=5), k=2)
+
+    assert ranked[0][0] == 'senior'
+
+
+def test_experience_alone_does_not_rank():
+    index = ResumeIndex()
+    index.add('java', resume(['Java'], experience=6))
+
+    assert index.rank(resume(['Cobol'], experience=5), k=10) == []
+
+
+def test_removed_and_replaced_resumes_are_compacted():
+    index = ResumeIndex(compact_ratio=0.25)
+    for i in range(8):
+        index.add(str(i), resume(['Python']))
+    for _ in range(20):
+        index.add('0', resume(['Java']))
+    index.remove('1')
+
+    assert len(index) == 7
+    assert len(index._ResumeIndex__ids) <= 7 / 0.75 + 1
+    assert '1' not in [doc_id for (doc_id, _) in
+                       index.rank(resume(['Python']), k=10)]
+    assert index.rank(resume(['Java']), k=10)[0][0] == '0'
+
+
+@pytest.mark.parametrize('text,years', [
+    ('We need 5+ years of experience in Python', 5),
+    ('3-5 yrs experience with Django', 3),
+    ('Experience: at least 4 years', 4),
+    ('Founded 20 years ago, we build web apps', 0),
+    ('Python developer', 0),
+])
+def test_extract_required_experience(text, years):
+    assert utilities.extract_required_experience(text) == years
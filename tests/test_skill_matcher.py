@@ -0,0 +1,119 @@
+import timeit
+
+import pytest
+
+from core import utilities
+from core.skill_matcher import SkillMatcher
+
+
+class FakeToken(object):
+
+    def __init__(self, text, is_stop=False, pos_='NOUN', ent_type_=''):
+        self.text = text
+        self.is_stop = is_stop
+        self.pos_ = pos_
+        self.ent_type_ = ent_type_
+
+
+class FakeSpan(object):
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = [FakeToken(word) for word in text.split()]
+
+    def __iter__(self):
+        return iter(self.tokens)
+
+
+@pytest.fixture(scope='module')
+def matcher():
+    return utilities.get_skill_matcher()
+
+
+@pytest.mark.parametrize('token,skill', [
+    ('python', 'python'),
+    ('pyhton', 'python'),
+    ('pytohn', 'python'),
+    ('djnago', 'django'),
+    ('tensorflw', 'tensorflow'),
+    ('scikit learn', 'scikit-learn'),
+])
+def test_typos_match_their_skill(matcher, token, skill):
+    assert matcher.lookup(token) == (skill, )
+
+
+@pytest.mark.parametrize('token', [
+    'phone', 'client', 'clients', 'event', 'tools', 'plain', 'plant',
+    'house', 'meets', 'profit', 'entry', 'expect', 'label', 'narrow',
+    'alone', 'clone', 'deadlines', 'nesting', 'docket', 'lodging',
+    'convent', 'parker', 'parsed', 'wining', 'pilling', 'budged',
+])
+def test_common_words_are_not_skills(matcher, token):
+    assert matcher.lookup(token) == ()
+
+
+@pytest.mark.parametrize('token', [
+    FakeToken('Vishal', pos_='PROPN', ent_type_='PERSON'),
+    FakeToken('Parker', pos_='PROPN', ent_type_='PERSON'),
+    FakeToken('Solartis', pos_='PROPN', ent_type_='ORG'),
+    FakeToken('vishal', ent_type_='PERSON'),
+    FakeToken('solartis', pos_='PROPN'),
+    FakeToken('TestNG'),
+    FakeToken('UiPath'),
+])
+def test_names_are_not_fuzzy_matched(token):
+    assert utilities.extract_skills([token], []) == []
+
+
+def test_short_tokens_only_match_exactly():
+    matcher = SkillMatcher(['flask', 'c'], min_length=6)
+
+    assert matcher.lookup('c') == ('c', )
+    assert matcher.lookup('flsak') == ()
+
+
+def test_extract_skills_ignores_common_words():
+    text = ('Phone support for clients , event tools . Meets deadlines in '
+            'house . Profit and entry . Pyhton and Djnago')
+    tokens = [FakeToken(word) for word in text.split()]
+    noun_chunks = [FakeSpan('scikit learn')]
+
+    skills = utilities.extract_skills(tokens, noun_chunks)
+
+    assert sorted(skills) == ['Django', 'Python', 'Scikit-learn']
+
+
+def test_exact_match_only_without_fuzzy():
+    matcher = SkillMatcher(['python'])
+
+    assert matcher.lookup('pyhton') == ('python', )
+    assert matcher.lookup('pyhton', fuzzy=False) == ()
+    assert matcher.lookup('python', fuzzy=False) == ('python', )
+
+
+def test_max_distance_is_configurable():
+    assert utilities.get_skill_matcher(max_distance=0).lookup('pyhton') == ()
+    assert utilities.get_skill_matcher(max_distance=2).lookup('pyhotn') == \
+        ('python', )
+
+
+def test_fuzzy_throughput_within_constant_factor_of_exact():
+    text = ('Experienced data engineer with strong pyhton and djnago skills , '
+            'built etl pipelines on aws using apache spark , kafka and '
+            'postgresql . Worked with clients to gather requirements , met '
+            'deadlines and mentored junior developers . Familiar with machine '
+            'learning , tensorflw , scikit learn and docker deployments . '
+            'Databse administration , finanace reporting and markting '
+            'analytics .').lower().split()
+
+    # uncached, so every lookup goes through the index
+    matcher = utilities.get_skill_matcher(cache_size=0)
+
+    def run(fuzzy):
+        for token in text:
+            matcher.lookup(token, fuzzy=fuzzy)
+
+    exact = min(timeit.repeat(lambda: run(False), number=20, repeat=5))
+    fuzzy = min(timeit.repeat(lambda: run(True), number=20, repeat=5))
+
+    assert fuzzy < 25 * exact